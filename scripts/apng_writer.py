@@ -0,0 +1,189 @@
+"""
+Indexed-palette APNG writer for animations too heavy to ship as SVG.
+Frames are drawn onto a Canvas of palette indices; only the rectangle that
+changed since the previous frame is compressed and written.
+"""
+
+import math
+import os
+import struct
+import tempfile
+import zlib
+from contextlib import contextmanager
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+ACTL_OFFSET = len(PNG_SIGNATURE) + 25  # acTL sits right after the IHDR chunk
+
+def hex_to_rgb(color):
+    """'#rrggbb' -> (r, g, b)."""
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+def blend(color, background, alpha):
+    """Flatten `color` at `alpha` opacity over `background` (both '#rrggbb')."""
+    fg = hex_to_rgb(color)
+    bg = hex_to_rgb(background)
+    return tuple(round(f * alpha + b * (1 - alpha)) for f, b in zip(fg, bg))
+
+def _chunk(kind, data):
+    crc = zlib.crc32(kind + data)
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', crc)
+
+class Canvas:
+    """A width x height grid of palette indices that tracks its dirty region."""
+
+    def __init__(self, width, height, background=0):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray([background]) * (width * height)
+        self.dirty = (0, 0, width, height)
+
+    def _mark(self, x0, y0, x1, y1):
+        if self.dirty is None:
+            self.dirty = (x0, y0, x1, y1)
+        else:
+            dx0, dy0, dx1, dy1 = self.dirty
+            self.dirty = (min(dx0, x0), min(dy0, y0), max(dx1, x1), max(dy1, y1))
+
+    def take_dirty(self):
+        """Return the region changed since the last call, or None."""
+        dirty, self.dirty = self.dirty, None
+        return dirty
+
+    def fill_rect(self, x, y, w, h, index):
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        x1, y1 = min(self.width, int(x + w)), min(self.height, int(y + h))
+        if x0 >= x1 or y0 >= y1:
+            return
+        span = bytes([index]) * (x1 - x0)
+        for row in range(y0, y1):
+            start = row * self.width + x0
+            self.pixels[start:start + len(span)] = span
+        self._mark(x0, y0, x1, y1)
+
+    def fill_circle(self, cx, cy, radius, index):
+        for row in range(int(cy - radius), int(cy + radius) + 1):
+            dy = row + 0.5 - cy
+            if abs(dy) > radius:
+                continue
+            half = (radius * radius - dy * dy) ** 0.5
+            x0 = round(cx - half)
+            self.fill_rect(x0, row, round(cx + half) - x0, 1, index)
+
+    def stroke_line(self, x0, y0, x1, y1, width, index):
+        length = max(abs(x1 - x0), abs(y1 - y0))
+        steps = max(1, int(length * 2))
+        half = width / 2
+        for i in range(steps + 1):
+            t = i / steps
+            x = x0 + (x1 - x0) * t
+            y = y0 + (y1 - y0) * t
+            self.fill_rect(round(x - half), round(y - half), width, width, index)
+
+    def stroke_arc(self, cx, cy, radius, start_angle, end_angle, width, index):
+        # Sample every half pixel along the circumference
+        steps = max(1, int(abs(end_angle - start_angle) * radius * 2))
+        half = width / 2
+        for i in range(steps + 1):
+            angle = start_angle + (end_angle - start_angle) * i / steps
+            x = cx + radius * math.cos(angle)
+            y = cy + radius * math.sin(angle)
+            self.fill_rect(round(x - half), round(y - half), width, width, index)
+
+    def scanlines(self, x0, y0, x1, y1):
+        """Raw PNG scanlines (filter type 0) for a region."""
+        rows = []
+        for row in range(y0, y1):
+            start = row * self.width
+            rows.append(b'\x00' + bytes(self.pixels[start + x0:start + x1]))
+        return b''.join(rows)
+
+class ApngWriter:
+    """Writes Canvas frames to an APNG file as they are produced.
+
+    Each frame only encodes the canvas's dirty rectangle. Frames with no
+    changes extend the previous frame's delay instead of adding a new one.
+    """
+
+    def __init__(self, fh, width, height, palette, frame_delay, transparent=None):
+        self._fh = fh
+        self.width = width
+        self.height = height
+        self.frame_delay = frame_delay
+        self.frames = 0
+        self.bytes_written = 0
+        self._sequence = 0
+        self._pending = None
+
+        self._write(PNG_SIGNATURE)
+        self._write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)))
+        # Frame count is patched in by close() once it is known
+        self._write(_chunk(b'acTL', struct.pack('>II', 0, 0)))
+        self._write(_chunk(b'PLTE', b''.join(bytes(rgb) for rgb in palette)))
+        if transparent is not None:
+            alpha = bytearray([255]) * (transparent + 1)
+            alpha[transparent] = 0
+            self._write(_chunk(b'tRNS', bytes(alpha)))
+
+    def _write(self, data):
+        self._fh.write(data)
+        self.bytes_written += len(data)
+
+    def add_frame(self, canvas, ticks=1):
+        """Emit the canvas's changes as a frame shown for `ticks` frame delays."""
+        region = canvas.take_dirty()
+        if self._pending is None and self.frames == 0:
+            # The default image must cover the whole canvas
+            region = (0, 0, self.width, self.height)
+        elif region is None:
+            if self._pending is not None:
+                self._pending[-1] += ticks
+            return
+
+        data = zlib.compress(canvas.scanlines(*region), 9)
+        self._flush_pending()
+        self._pending = [region, data, ticks]
+
+    def _flush_pending(self):
+        if self._pending is None:
+            return
+        (x0, y0, x1, y1), data, ticks = self._pending
+        delay_ms = min(0xFFFF, round(ticks * self.frame_delay * 1000))
+        self._write(_chunk(b'fcTL', struct.pack(
+            '>IIIIIHHBB', self._sequence, x1 - x0, y1 - y0, x0, y0, delay_ms, 1000, 0, 0
+        )))
+        self._sequence += 1
+        if self.frames == 0:
+            self._write(_chunk(b'IDAT', data))
+        else:
+            self._write(_chunk(b'fdAT', struct.pack('>I', self._sequence) + data))
+            self._sequence += 1
+        self.frames += 1
+        self._pending = None
+
+    def close(self):
+        self._flush_pending()
+        self._write(_chunk(b'IEND', b''))
+        # Loop forever (num_plays = 0)
+        self._fh.seek(ACTL_OFFSET)
+        self._fh.write(_chunk(b'acTL', struct.pack('>II', self.frames, 0)))
+        self._fh.seek(0, os.SEEK_END)
+
+@contextmanager
+def open_apng(path, width, height, palette, frame_delay, transparent=None):
+    """Stream an APNG to `path`, renaming it into place once complete."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'w+b') as fh:
+            writer = ApngWriter(fh, width, height, palette, frame_delay, transparent)
+            yield writer
+            writer.close()
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,139 @@
+"""
+Batch-renders circular mazes across a process pool.
+Renders a date range or an explicit list of seeds, at one or more sizes.
+Each SVG is cached under its seed + config hash, so reruns only render what's missing.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import generate_maze
+import svg_writer
+
+CACHE_DIR = '.cache/mazes'
+OUTPUT_DIR = 'dist/mazes'
+
+def _source_digest():
+    """Hash of the generator source, so code changes invalidate the cache."""
+    digest = hashlib.sha256()
+    for module in (generate_maze, svg_writer):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def config_hash(seed, rings, sectors_base, source_digest):
+    """Content address for one rendered maze."""
+    config = {
+        'seed': seed,
+        'rings': rings,
+        'sectors_base': sectors_base,
+        'ring_width': generate_maze.RING_WIDTH,
+        'inner_radius': generate_maze.INNER_RADIUS,
+        'frame_duration': generate_maze.FRAME_DURATION,
+        'colors': [
+            generate_maze.BG_COLOR,
+            generate_maze.WALL_COLOR,
+            generate_maze.EXPLORING_COLOR,
+            generate_maze.SOLUTION_COLOR,
+            generate_maze.START_COLOR,
+            generate_maze.END_COLOR,
+        ],
+        'source': source_digest,
+    }
+    blob = json.dumps(config, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+def render_job(job):
+    """Render one maze into the cache. Runs in a worker process."""
+    seed, rings, sectors_base, cache_path = job
+    maze, start, end, exploration_order, path = generate_maze.build_maze(
+        rings, sectors_base, seed
+    )
+    # open_svg writes atomically, so a killed worker never leaves a partial entry
+    with svg_writer.open_svg(cache_path) as out:
+        generate_maze.generate_svg(maze, exploration_order, path, start, end, out)
+    return cache_path
+
+def parse_sizes(value):
+    """Parse '8x8,10x8' into [(8, 8), (10, 8)] (rings x base sectors)."""
+    sizes = []
+    for item in value.split(','):
+        try:
+            rings, sectors_base = (int(part) for part in item.lower().split('x'))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid size {item!r}, expected RINGSxSECTORS")
+        if rings < 1 or sectors_base < 1:
+            raise argparse.ArgumentTypeError(
+                f"invalid size {item!r}, rings and sectors must be at least 1"
+            )
+        sizes.append((rings, sectors_base))
+    return sizes
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def iter_targets(args):
+    """Yield (label, seed) pairs for the requested dates and seeds."""
+    if args.start:
+        day = args.start
+        end = args.end or args.start
+        while day <= end:
+            yield day.isoformat(), generate_maze.create_seed(day)
+            day += timedelta(days=1)
+    for seed in args.seeds or []:
+        yield f"seed-{seed}", seed
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-render circular mazes.")
+    parser.add_argument('--start', type=parse_date, help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', type=parse_date, help="last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument('--seeds', type=int, nargs='+', help="explicit seeds to render")
+    parser.add_argument('--sizes', type=parse_sizes,
+                        default=[(generate_maze.RINGS, generate_maze.SECTORS_BASE)],
+                        help="comma-separated RINGSxSECTORS list, e.g. 8x8,10x8")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="process pool size (defaults to CPU count)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--out-dir', default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    if not args.start and (args.end or not args.seeds):
+        args.start = date.today()
+    if args.end and args.end < args.start:
+        parser.error(f"--end {args.end} is before --start {args.start}")
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    digest = _source_digest()
+    outputs = []
+    jobs = {}
+    for label, seed in iter_targets(args):
+        for rings, sectors_base in args.sizes:
+            key = config_hash(seed, rings, sectors_base, digest)
+            cache_path = os.path.join(args.cache_dir, f"{key}.svg")
+            out_path = os.path.join(args.out_dir, f"{label}-{rings}x{sectors_base}.svg")
+            outputs.append((cache_path, out_path))
+            if not os.path.exists(cache_path):
+                jobs[cache_path] = (seed, rings, sectors_base, cache_path)
+
+    print(f"Mazes requested: {len(outputs)}, cached: {len(outputs) - len(jobs)}, "
+          f"to render: {len(jobs)}")
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for _ in pool.map(render_job, jobs.values()):
+                pass
+
+    for cache_path, out_path in outputs:
+        shutil.copyfile(cache_path, out_path)
+
+    print(f"Wrote {len(outputs)} mazes to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark sweep for the generator scripts.
+Runs Life across board sizes and generation counts and the maze across ring
+counts, records per-stage timings and counters, and compares them against a
+saved baseline. With --warm every case reads its stages from a primed
+cache, so only emit does real work. Counter growth and stage slowdowns
+beyond the noise seen across repeats both fail the run; --warn-timing
+downgrades slowdowns to warnings on machines too noisy to time reliably.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+
+import generate_life
+import generate_maze
+from profiling import Profiler, write_report
+
+# (padding_x, padding_y) around the "RT" letters; the default board is 63x23
+LIFE_PADDINGS = [(25, 8), (50, 20), (100, 40)]
+LIFE_GENERATIONS = [80, 240]
+MAZE_RINGS = [8, 12, 16]
+MAZE_SEED = 1
+
+def bench_life(padding, generations, image_format, out_dir, cache_dir=None):
+    profiler = Profiler()
+    grid = generate_life.create_initial_grid(*padding)
+    output = f"{out_dir}/life.{'png' if image_format == 'apng' else 'svg'}"
+    generate_life.write_life(grid, generations, output, image_format,
+                             profiler=profiler, cache_dir=cache_dir)
+    case = f"life-{len(grid[0])}x{len(grid)}-g{generations}-{image_format}"
+    return case, profiler
+
+def bench_maze(rings, image_format, out_dir, cache_dir=None):
+    profiler = Profiler()
+    maze, start, end, exploration_order, path = generate_maze.build_maze(
+        rings, generate_maze.SECTORS_BASE, MAZE_SEED, profiler, cache_dir
+    )
+    output = f"{out_dir}/maze.{'png' if image_format == 'apng' else 'svg'}"
+    generate_maze.write_maze(maze, start, end, exploration_order, path, output,
+                             image_format, profiler=profiler)
+    case = f"maze-r{rings}-{image_format}"
+    return case, profiler
+
+def iter_cases(args):
+    paddings = LIFE_PADDINGS[:1] if args.quick else LIFE_PADDINGS
+    generation_counts = LIFE_GENERATIONS[:1] if args.quick else LIFE_GENERATIONS
+    rings = MAZE_RINGS[:2] if args.quick else MAZE_RINGS
+    for padding in paddings:
+        for generations in generation_counts:
+            yield bench_life, (padding, generations, args.format)
+    for ring_count in rings:
+        yield bench_maze, (ring_count, args.format)
+
+def run(args):
+    """Run every case `args.repeat` times, keeping the median time per stage.
+    
+    The spread (max - min) of each stage across repeats is kept alongside so
+    comparisons can tell noise from a real slowdown.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        cache_dir = f"{out_dir}/stages" if args.warm else None
+        for bench, params in iter_cases(args):
+            if cache_dir:
+                # Untimed run that fills the cache for the repeats
+                bench(*params, out_dir, cache_dir)
+            timings = {}
+            for _ in range(args.repeat):
+                case, profiler = bench(*params, out_dir, cache_dir)
+                report = profiler.report()
+                for stage, seconds in report['stages'].items():
+                    timings.setdefault(stage, []).append(seconds)
+            report['stages'] = {
+                stage: round(statistics.median(values), 6) for stage, values in timings.items()
+            }
+            report['stage_spread'] = {
+                stage: round(max(values) - min(values), 6) for stage, values in timings.items()
+            }
+            report['total_seconds'] = round(sum(report['stages'].values()), 6)
+            del report['params']
+            if cache_dir:
+                case += '-warm'
+            results[case] = report
+            print(f"{case:<32} {report['total_seconds'] * 1000:9.1f} ms  "
+                  f"{report['counters'].get('output.bytes', 0):>10} bytes")
+    return results
+
+def compare_counters(results, baseline):
+    """Compare counters exactly; returns (regressions, improvements).
+    
+    Counters are deterministic for a given tree, so any growth is a
+    regression and any drop means the baseline should be refreshed.
+    """
+    regressions = []
+    improvements = []
+    for case, report in results.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        for counter, value in report['counters'].items():
+            before = base['counters'].get(counter)
+            if before is None or value == before:
+                continue
+            line = f"{case} {counter}: {before} -> {value}"
+            (regressions if value > before else improvements).append(line)
+    return regressions, improvements
+
+def compare_timings(results, baseline, tolerance):
+    """Return stage slowdowns that exceed both the tolerance and the noise.
+    
+    A stage only counts as slower if its median moved by more than
+    `tolerance` of the baseline and by more than the combined spread seen
+    across repeats in both runs.
+    """
+    slowdowns = []
+    for case, report in results.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        for stage, seconds in report['stages'].items():
+            before = base['stages'].get(stage)
+            if before is None:
+                continue
+            noise = (report.get('stage_spread', {}).get(stage, 0)
+                     + base.get('stage_spread', {}).get(stage, 0))
+            if seconds - before > max(before * tolerance, noise):
+                slowdowns.append(
+                    f"{case} {stage}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                    f"(noise {noise * 1000:.1f} ms)"
+                )
+    return slowdowns
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generator scripts.")
+    parser.add_argument('--format', choices=['svg', 'apng'], default='svg')
+    parser.add_argument('--quick', action='store_true', help="only run the smallest cases")
+    parser.add_argument('--warm', action='store_true',
+                        help="time runs that read every cached stage back from disk")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per case; the median counts")
+    parser.add_argument('--profile', metavar='PATH', help="write the results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a previous --profile")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before failing, as a fraction (default 0.25)")
+    parser.add_argument('--warn-timing', action='store_true',
+                        help="only warn on timing slowdowns; counter growth still fails")
+    args = parser.parse_args()
+    
+    if args.repeat < 1:
+        parser.error(f"--repeat must be at least 1, got {args.repeat}")
+
+    results = run(args)
+
+    if args.profile:
+        write_report(args.profile, results)
+        print(f"Wrote results to {args.profile}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions, improvements = compare_counters(results, baseline)
+        if improvements:
+            print(f"\n{len(improvements)} counter(s) dropped; consider refreshing the baseline:")
+            for line in improvements:
+                print(f"  {line}")
+        
+        slowdowns = compare_timings(results, baseline, args.tolerance)
+        if not args.warn_timing:
+            regressions.extend(slowdowns)
+        elif slowdowns:
+            print(f"\n{len(slowdowns)} timing warning(s) against {args.baseline}:")
+            for line in slowdowns:
+                print(f"  {line}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
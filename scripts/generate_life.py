@@ -4,7 +4,12 @@ Starts with initials "RT" that evolve and transform.
 Runs via GitHub Actions, outputs to dist/game-of-life.svg
 """
 
-import os
+import argparse
+
+from apng_writer import Canvas, hex_to_rgb, open_apng
+from profiling import Profiler, write_report
+from stage_cache import CACHE_DIR as STAGE_CACHE_DIR, cached_stream, prune, stage_key
+from svg_writer import fmt, open_svg
 
 # Configuration
 CELL_SIZE = 6
@@ -67,7 +72,7 @@ def place_letter(grid, letter, start_x, start_y):
             if 0 <= y < len(grid) and 0 <= x < len(grid[0]):
                 grid[y][x] = bool(cell)
 
-def create_initial_grid():
+def create_initial_grid(padding_x=25, padding_y=8):
     """Create grid with 'RT' initials centered."""
     # Calculate grid size to fit letters nicely
     letter_height = 7
@@ -77,10 +82,7 @@ def create_initial_grid():
     # "RT" = 2 letters
     total_letter_width = (letter_width * 2) + spacing
     
-    # Add padding around letters
-    padding_x = 25
-    padding_y = 8
-    
+    # Padding around letters sets the board size
     grid_width = total_letter_width + (padding_x * 2)
     grid_height = letter_height + (padding_y * 2)
     
@@ -127,58 +129,176 @@ def next_generation(grid):
     
     return new_grid
 
-def generate_svg(generations_data, grid_width, grid_height):
-    """Generate animated SVG from generation data."""
+def iter_generations(grid, count, stats=None):
+    """Yield `count` generations, starting with `grid` itself.
+    
+    If `stats` is given, cells evaluated and cells that flipped are added to it.
+    """
+    yield grid
+    cells = len(grid) * len(grid[0])
+    for _ in range(count - 1):
+        new_grid = next_generation(grid)
+        if stats is not None:
+            changed = sum(
+                a != b for old_row, new_row in zip(grid, new_grid) for a, b in zip(old_row, new_row)
+            )
+            stats['life.generations'] = stats.get('life.generations', 0) + 1
+            stats['life.cells_updated'] = stats.get('life.cells_updated', 0) + cells
+            stats['life.cells_changed'] = stats.get('life.cells_changed', 0) + changed
+        grid = new_grid
+        yield grid
+
+def pack_grid(grid):
+    """Encode a grid as a hex bitmap (row-major, first cell is the top bit)."""
+    bits = "".join("1" if cell else "0" for row in grid for cell in row)
+    return f"{int(bits, 2):x}"
+
+def unpack_grid(text, grid_width, grid_height):
+    """Inverse of pack_grid()."""
+    bits = bin(int(text, 16))[2:].zfill(grid_width * grid_height)
+    return [
+        [bit == "1" for bit in bits[y * grid_width:(y + 1) * grid_width]]
+        for y in range(grid_height)
+    ]
+
+def write_life(grid, generations, output, image_format='svg', compress=False,
+               profiler=None, cache_dir=None):
+    """Simulate from `grid` and render to `output`; returns the bytes written.
+    
+    With a cache_dir, generation bitmaps are reused from disk whenever the
+    starting grid, generation count and simulation code are unchanged.
+    """
+    profiler = profiler or Profiler()
+    grid_height = len(grid)
+    grid_width = len(grid[0])
+    
+    key = stage_key(
+        'life-generations',
+        {'grid': pack_grid(grid), 'width': grid_width, 'height': grid_height,
+         'generations': generations},
+        # pack_grid/unpack_grid set the on-disk format, so they count as code too
+        (iter_generations, next_generation, count_neighbors, pack_grid, unpack_grid),
+    )
+    frames = cached_stream(
+        'life-generations', key,
+        lambda stats: iter_generations(grid, generations, stats),
+        pack_grid, lambda text: unpack_grid(text, grid_width, grid_height),
+        cache_dir, profiler,
+    )
+    
+    if image_format == 'apng':
+        # Frames come straight from the simulation; nothing is kept around,
+        # so simulation and encoding share one stage
+        width, height = grid_width * CELL_SIZE, grid_height * CELL_SIZE
+        with profiler.stage('simulate+emit'):
+            with open_apng(output, width, height, APNG_PALETTE, FRAME_DURATION, transparent=0) as out:
+                render_apng(frames, grid_width, grid_height, out)
+        profiler.count('apng.frames', out.frames)
+        rate_stage = 'simulate+emit'
+    else:
+        with profiler.stage('simulate'):
+            generations_data = list(frames)
+        with profiler.stage('emit'):
+            # Stream SVG straight to disk
+            with open_svg(output, compress=compress) as out:
+                generate_svg(generations_data, grid_width, grid_height, out)
+            profiler.count('svg.bytes', out.svg_bytes)
+        rate_stage = 'simulate'
+    
+    # Generations read back from the cache say nothing about simulation speed
+    if not profiler.counters.get('cache.life-generations.hits'):
+        profiler.rate('generations_per_second', 'life.generations', rate_stage)
+    profiler.count('output.bytes', out.bytes_written)
+    return out.bytes_written
+
+def render_apng(generations, grid_width, grid_height, out):
+    """Paint generations straight from the simulation into an ApngWriter.
+    
+    Only cells that changed since the previous generation are repainted, so
+    each frame encodes just the region the pattern touched.
+    """
+    # Palette indices: 0 transparent, 1 cell, 2 bright (initial) cell
+    canvas = Canvas(grid_width * CELL_SIZE, grid_height * CELL_SIZE)
+    size = CELL_SIZE - 2
+    initial = set()
+    previous = [[False] * grid_width for _ in range(grid_height)]
+    
+    for frame_idx, grid in enumerate(generations):
+        for y in range(grid_height):
+            row, prev_row = grid[y], previous[y]
+            if row == prev_row:
+                continue
+            for x in range(grid_width):
+                if row[x] == prev_row[x]:
+                    continue
+                # Cells alive in the first frames (part of letters) are brighter
+                if row[x] and frame_idx < 3:
+                    initial.add((x, y))
+                index = (2 if (x, y) in initial else 1) if row[x] else 0
+                canvas.fill_rect(x * CELL_SIZE + 1, y * CELL_SIZE + 1, size, size, index)
+        out.add_frame(canvas)
+        previous = grid
+
+APNG_PALETTE = [(0, 0, 0), hex_to_rgb(CELL_COLOR), hex_to_rgb(CELL_COLOR_BRIGHT)]
+
+def generate_svg(generations_data, grid_width, grid_height, out):
+    """Stream the animated SVG for the generation data to an SvgWriter."""
     width = grid_width * CELL_SIZE
     height = grid_height * CELL_SIZE
-    total_duration = len(generations_data) * FRAME_DURATION
+    frame_count = len(generations_data)
+    total_duration = frame_count * FRAME_DURATION
     
-    svg_parts = [
-        f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">',
-    ]
+    out.line(f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">')
     
     # Track all cells that are ever alive
     cell_frames = {}
     
     for frame_idx, grid in enumerate(generations_data):
         for y in range(grid_height):
+            row = grid[y]
             for x in range(grid_width):
-                if grid[y][x]:
+                if row[x]:
                     key = (x, y)
                     if key not in cell_frames:
-                        cell_frames[key] = []
-                    cell_frames[key].append(frame_idx)
+                        cell_frames[key] = set()
+                    cell_frames[key].add(frame_idx)
+    
+    size = CELL_SIZE - 2
     
     # Generate cells with visibility animations
     for (x, y), frames in cell_frames.items():
-        px = x * CELL_SIZE
-        py = y * CELL_SIZE
+        px = fmt(x * CELL_SIZE + 1)
+        py = fmt(y * CELL_SIZE + 1)
         
         # Create visibility keyframes
-        values = []
-        for i in range(len(generations_data)):
-            values.append("1" if i in frames else "0")
-        values_str = ";".join(values)
+        values_str = ";".join("1" if i in frames else "0" for i in range(frame_count))
         
         # Cells that appear in early frames (part of letters) are brighter
         is_initial = 0 in frames or 1 in frames or 2 in frames
         color = CELL_COLOR_BRIGHT if is_initial else CELL_COLOR
         
-        svg_parts.append(
-            f'  <rect x="{px + 1}" y="{py + 1}" width="{CELL_SIZE - 2}" height="{CELL_SIZE - 2}" '
+        out.line(
+            f'  <rect x="{px}" y="{py}" width="{size}" height="{size}" '
             f'rx="1" fill="{color}" opacity="0">'
         )
-        svg_parts.append(
+        out.line(
             f'    <animate attributeName="opacity" values="{values_str}" '
             f'dur="{total_duration}s" repeatCount="indefinite" calcMode="discrete"/>'
         )
-        svg_parts.append('  </rect>')
+        out.line('  </rect>')
     
-    svg_parts.append('</svg>')
-    
-    return '\n'.join(svg_parts)
+    out.line('</svg>')
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate the Game of Life animation.")
+    parser.add_argument('--format', choices=['svg', 'apng'], default='svg',
+                        help="animated SVG, or a delta-encoded APNG for very large boards")
+    parser.add_argument('--svgz', action='store_true', help="write gzip-compressed .svgz output")
+    parser.add_argument('--profile', metavar='PATH', help="write a per-stage JSON timing report")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-run the simulation instead of reusing cached generations")
+    args = parser.parse_args()
+    
     print("Generating Game of Life with 'RT' initials...")
     
     # Initialize with letters
@@ -193,23 +313,26 @@ def main():
     for row in grid:
         print("".join(["█" if cell else "·" for cell in row]))
     
-    # Run simulation
-    generations = [grid]
-    for i in range(GENERATIONS - 1):
-        grid = next_generation(grid)
-        generations.append(grid)
+    if args.format == 'apng':
+        output = 'dist/game-of-life.png'
+    else:
+        output = 'dist/game-of-life.svgz' if args.svgz else 'dist/game-of-life.svg'
+    cache_dir = None if args.no_cache else STAGE_CACHE_DIR
+    if cache_dir:
+        prune(cache_dir)
     
-    # Generate SVG
-    svg_content = generate_svg(generations, grid_width, grid_height)
+    profiler = Profiler()
+    size = write_life(grid, GENERATIONS, output, args.format, args.svgz, profiler, cache_dir)
     
-    # Write output
-    os.makedirs('dist', exist_ok=True)
-    
-    with open('dist/game-of-life.svg', 'w') as f:
-        f.write(svg_content)
-    
-    print(f"\nGenerated game-of-life.svg")
+    print(f"\nGenerated {output} ({size} bytes)")
     print(f"Frames: {GENERATIONS}, Duration: {GENERATIONS * FRAME_DURATION}s")
+    
+    if args.profile:
+        write_report(args.profile, profiler.report(
+            script='generate_life', grid_width=grid_width, grid_height=grid_height,
+            generations=GENERATIONS, format=args.format,
+        ))
+        print(f"Wrote profile to {args.profile}")
 
 if __name__ == "__main__":
     main()
@@ -3,12 +3,18 @@ Generates a circular/spiral maze with A* pathfinding animation.
 Neon aesthetic with subtle glow trails.
 """
 
+import argparse
 import random
 import hashlib
 import heapq
-import os
 import math
 from datetime import datetime
+from fractions import Fraction
+
+from apng_writer import Canvas, blend, hex_to_rgb, open_apng
+from profiling import Profiler, write_report
+from stage_cache import CACHE_DIR as STAGE_CACHE_DIR, cached, prune, stage_key
+from svg_writer import fmt, open_svg
 
 # Configuration
 RINGS = 8  # Number of concentric rings
@@ -27,15 +33,34 @@ SOLUTION_COLOR = "#f0f0f0"  # Soft white
 START_COLOR = "#00cc77"  # Muted neon green
 END_COLOR = "#ff6b6b"  # Neon coral
 
-def create_seed():
-    today = datetime.now().strftime("%Y-%m-%d")
-    return int(hashlib.md5(today.encode()).hexdigest()[:8], 16)
+def create_seed(day=None):
+    """Derive the maze seed from a date (defaults to today)."""
+    if day is None:
+        day = datetime.now()
+    return int(hashlib.md5(day.strftime("%Y-%m-%d").encode()).hexdigest()[:8], 16)
 
 class CircularMaze:
-    def __init__(self, rings, base_sectors):
-        random.seed(create_seed())
+    def __init__(self, rings, base_sectors, seed=None):
+        self.rng = random.Random(create_seed() if seed is None else seed)
+        self._layout(rings, base_sectors)
+        self._generate()
+    
+    @classmethod
+    def from_walls(cls, rings, base_sectors, radial_walls, ring_walls):
+        """Rebuild a maze from previously generated wall arrays."""
+        maze = cls.__new__(cls)
+        maze._layout(rings, base_sectors)
+        maze.radial_walls = radial_walls
+        maze.ring_walls = ring_walls
+        maze.stats = {}
+        return maze
+    
+    def _layout(self, rings, base_sectors):
+        """Set up ring geometry with every wall closed."""
         self.rings = rings
         self.base_sectors = base_sectors
+        # Grow the canvas for mazes larger than the default layout
+        self.center = CENTER_X + max(0, rings - RINGS) * RING_WIDTH
         
         # Each ring has a number of sectors (cells)
         # Inner rings have fewer sectors, outer rings have more
@@ -55,8 +80,6 @@ class CircularMaze:
             num_sectors = self.sectors_per_ring[r]
             self.radial_walls.append([True] * num_sectors)
             self.ring_walls.append([True] * num_sectors)
-        
-        self._generate()
     
     def _get_neighbors(self, ring, sector):
         """Get neighboring cells."""
@@ -90,6 +113,7 @@ class CircularMaze:
         """Generate maze using randomized Prim's algorithm."""
         visited = set()
         walls = []
+        pushes = pops = 0
         
         # Start from center
         start_cell = (0, 0)
@@ -98,11 +122,13 @@ class CircularMaze:
         # Add walls of starting cell
         for neighbor in self._get_neighbors(0, 0):
             walls.append((start_cell, neighbor[:2], neighbor[2], neighbor[3]))
+            pushes += 1
         
-        random.shuffle(walls)
+        self.rng.shuffle(walls)
         
         while walls:
-            wall = walls.pop(random.randint(0, len(walls) - 1) if walls else 0)
+            wall = walls.pop(self.rng.randint(0, len(walls) - 1) if walls else 0)
+            pops += 1
             cell1, cell2, wall_type, wall_idx = wall
             
             if cell2 in visited:
@@ -129,14 +155,17 @@ class CircularMaze:
             for neighbor in self._get_neighbors(r, s):
                 if neighbor[:2] not in visited:
                     walls.append((cell2, neighbor[:2], neighbor[2], neighbor[3]))
+                    pushes += 1
+        
+        self.stats = {'maze.frontier_pushes': pushes, 'maze.frontier_pops': pops}
     
     def get_cell_center(self, ring, sector):
         """Get the center point of a cell."""
         num_sectors = self.sectors_per_ring[ring]
         angle = (2 * math.pi * sector / num_sectors) + (math.pi / num_sectors)
         radius = INNER_RADIUS + (ring + 0.5) * RING_WIDTH
-        x = CENTER_X + radius * math.cos(angle)
-        y = CENTER_Y + radius * math.sin(angle)
+        x = self.center + radius * math.cos(angle)
+        y = self.center + radius * math.sin(angle)
         return (x, y)
     
     def get_graph(self):
@@ -177,8 +206,11 @@ class CircularMaze:
         
         return graph
 
-def astar_circular(maze, start, end):
-    """A* for circular maze."""
+def astar_circular(maze, start, end, stats=None):
+    """A* for circular maze.
+    
+    If `stats` is given, node expansions and heap traffic are added to it.
+    """
     graph = maze.get_graph()
     
     def heuristic(cell):
@@ -188,6 +220,8 @@ def astar_circular(maze, start, end):
     
     open_set = []
     heapq.heappush(open_set, (0, start))
+    pushes = 1
+    expanded = pops = 0
     
     came_from = {}
     g_score = {start: 0}
@@ -197,10 +231,12 @@ def astar_circular(maze, start, end):
     
     while open_set:
         current = heapq.heappop(open_set)[1]
+        pops += 1
         
         if current in visited:
             continue
         visited.add(current)
+        expanded += 1
         
         if current != start and current != end:
             exploration_order.append(current)
@@ -212,7 +248,7 @@ def astar_circular(maze, start, end):
                 current = came_from[current]
             path.append(start)
             path.reverse()
-            return exploration_order, path
+            break
         
         for neighbor in graph.get(current, []):
             tentative_g = g_score[current] + 1
@@ -222,155 +258,405 @@ def astar_circular(maze, start, end):
                 g_score[neighbor] = tentative_g
                 f = tentative_g + heuristic(neighbor)
                 heapq.heappush(open_set, (f, neighbor))
+                pushes += 1
+    else:
+        path = []
+    
+    if stats is not None:
+        stats['astar.nodes_expanded'] = stats.get('astar.nodes_expanded', 0) + expanded
+        stats['astar.heap_pushes'] = stats.get('astar.heap_pushes', 0) + pushes
+        stats['astar.heap_pops'] = stats.get('astar.heap_pops', 0) + pops
+    return exploration_order, path
+
+def _polar(maze, radius, angle):
+    x = maze.center + radius * math.cos(angle)
+    y = maze.center + radius * math.sin(angle)
+    return f"{fmt(x)} {fmt(y)}"
+
+def iter_walls(maze):
+    """Yield the geometry of every wall that exists in the maze.
+    
+    Radial walls come out as ('line', angle, inner_radius, outer_radius), with
+    walls at the same angle in neighbouring rings merged into one segment.
+    Ring walls come out as ('arc', radius, start_angle, end_angle), one per
+    run of consecutive closed sectors.
+    """
+    # Radial walls, grouped by angle so aligned walls join up across rings
+    rings_at_angle = {}
+    for r in range(maze.rings):
+        num_sectors = maze.sectors_per_ring[r]
+        for s in range(num_sectors):
+            if maze.radial_walls[r][s]:
+                key = Fraction(s + 1, num_sectors) % 1
+                rings_at_angle.setdefault(key, []).append(r)
+    
+    for key, rings in rings_at_angle.items():
+        angle = 2 * math.pi * key
+        run_start = rings[0]
+        for i, r in enumerate(rings):
+            if i + 1 < len(rings) and rings[i + 1] == r + 1:
+                continue
+            inner_r = INNER_RADIUS + run_start * RING_WIDTH
+            outer_r = INNER_RADIUS + (r + 1) * RING_WIDTH
+            yield ('line', angle, inner_r, outer_r)
+            if i + 1 < len(rings):
+                run_start = rings[i + 1]
+    
+    # Ring walls, as arcs covering each run of consecutive closed sectors
+    for r in range(maze.rings):
+        num_sectors = maze.sectors_per_ring[r]
+        walls = maze.ring_walls[r]
+        radius = INNER_RADIUS + (r + 1) * RING_WIDTH
+        step = 2 * math.pi / num_sectors
+        
+        if all(walls):
+            yield ('arc', radius, 0, 2 * math.pi)
+            continue
+        
+        # Walk the ring starting just after an opening so runs never wrap
+        first = walls.index(False) + 1
+        run_length = 0
+        for i in range(num_sectors + 1):
+            s = (first + i) % num_sectors
+            if i < num_sectors and walls[s]:
+                run_length += 1
+                continue
+            if run_length:
+                end_angle = (first + i) * step
+                yield ('arc', radius, end_angle - run_length * step, end_angle)
+            run_length = 0
+
+def iter_wall_path(maze):
+    """Yield SVG path commands for every wall in the maze."""
+    for kind, *geometry in iter_walls(maze):
+        if kind == 'line':
+            angle, inner_r, outer_r = geometry
+            yield f"M{_polar(maze, inner_r, angle)}L{_polar(maze, outer_r, angle)}"
+            continue
+        
+        radius, start_angle, end_angle = geometry
+        if end_angle - start_angle >= 2 * math.pi:
+            # A full circle can't be a single arc, so split it in half
+            yield (
+                f"M{_polar(maze, radius, start_angle)}"
+                f"A{radius} {radius} 0 0 1 {_polar(maze, radius, start_angle + math.pi)}"
+                f"A{radius} {radius} 0 0 1 {_polar(maze, radius, end_angle)}"
+            )
+            continue
+        
+        large_arc = 1 if end_angle - start_angle > math.pi else 0
+        yield (
+            f"M{_polar(maze, radius, start_angle)}"
+            f"A{radius} {radius} 0 {large_arc} 1 {_polar(maze, radius, end_angle)}"
+        )
+
+def _reveal_groups(appear_frames, first_frame):
+    """Bucket reveal times so each bucket can share one CSS keyframe.
     
-    return exploration_order, []
+    A cell that appears at frame a and stays until the loop ends is emulated
+    by a shared "show for L frames" keyframe delayed by a, inside a group
+    that is only visible from the bucket's first frame onwards. The part of
+    the window that wraps into the next loop falls before the group shows,
+    which is exact while a <= 2 * bucket_start, so bucket sizes double and
+    the number of keyframes grows with log(cells).
+    """
+    groups = []
+    bucket_start = first_frame
+    bucket = []
+    for index, frame in appear_frames:
+        if frame > 2 * bucket_start:
+            groups.append((bucket_start, bucket))
+            bucket_start = frame
+            bucket = []
+        bucket.append((index, frame))
+    if bucket:
+        groups.append((bucket_start, bucket))
+    return groups
 
-def generate_svg(maze, exploration_order, path, start, end):
-    svg_width = CENTER_X * 2
-    svg_height = CENTER_Y * 2
+def _pct(frames, total_frames):
+    value = f"{100 * frames / total_frames:.3f}".rstrip("0").rstrip(".")
+    return f"{value}%"
+
+def _seconds(frames):
+    value = f"{frames * FRAME_DURATION:.3f}".rstrip("0").rstrip(".")
+    return f"{value}s"
+
+SVG_DEFS = [
+    '  <defs>',
+    '    <filter id="glow" x="-50%" y="-50%" width="200%" height="200%">',
+    '      <feGaussianBlur stdDeviation="2" result="blur"/>',
+    '      <feMerge>',
+    '        <feMergeNode in="blur"/>',
+    '        <feMergeNode in="SourceGraphic"/>',
+    '      </feMerge>',
+    '    </filter>',
+    '    <filter id="glow-strong" x="-50%" y="-50%" width="200%" height="200%">',
+    '      <feGaussianBlur stdDeviation="3" result="blur"/>',
+    '      <feMerge>',
+    '        <feMergeNode in="blur"/>',
+    '        <feMergeNode in="blur"/>',
+    '        <feMergeNode in="SourceGraphic"/>',
+    '      </feMerge>',
+    '    </filter>',
+    '  </defs>',
+]
+
+def generate_svg(maze, exploration_order, path, start, end, out):
+    """Stream the animated maze SVG to an SvgWriter."""
+    svg_width = maze.center * 2
+    svg_height = maze.center * 2
     
     explore_frames = len(exploration_order)
     path_frames = len(path)
     pause_frames = 15
     total_frames = explore_frames + path_frames + pause_frames
-    total_duration = total_frames * FRAME_DURATION
-    
-    svg_parts = [
-        f'<svg width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}" xmlns="http://www.w3.org/2000/svg">',
-        '  <defs>',
-        '    <filter id="glow" x="-50%" y="-50%" width="200%" height="200%">',
-        '      <feGaussianBlur stdDeviation="2" result="blur"/>',
-        '      <feMerge>',
-        '        <feMergeNode in="blur"/>',
-        '        <feMergeNode in="SourceGraphic"/>',
-        '      </feMerge>',
-        '    </filter>',
-        '    <filter id="glow-strong" x="-50%" y="-50%" width="200%" height="200%">',
-        '      <feGaussianBlur stdDeviation="3" result="blur"/>',
-        '      <feMerge>',
-        '        <feMergeNode in="blur"/>',
-        '        <feMergeNode in="blur"/>',
-        '        <feMergeNode in="SourceGraphic"/>',
-        '      </feMerge>',
-        '    </filter>',
-        '  </defs>',
-        f'  <rect width="{svg_width}" height="{svg_height}" fill="{BG_COLOR}"/>',
+    duration = _seconds(total_frames)
+    
+    # Explored cells dim over 5% of the loop once the path is drawn, then
+    # fade out with the loop; solution cells hold until 3 frames from the end
+    fade_frame = explore_frames + path_frames
+    
+    explored = [(i, i) for i in range(explore_frames)]
+    solution = [
+        (i, explore_frames + i) for i, cell in enumerate(path)
+        if cell != start and cell != end
+    ]
+    layers = [
+        ('e', exploration_order, explored, 0, RING_WIDTH * 0.3, EXPLORING_COLOR, 'glow',
+         [(fade_frame, '.6'), (fade_frame + total_frames * 0.05, '.15')]),
+        ('p', path, solution, explore_frames, RING_WIDTH * 0.35, SOLUTION_COLOR, 'glow-strong',
+         [(total_frames - 3, '.9')]),
     ]
     
-    # Draw maze walls
-    # Concentric ring walls
-    for r in range(maze.rings):
-        outer_radius = INNER_RADIUS + (r + 1) * RING_WIDTH
-        svg_parts.append(
-            f'  <circle cx="{CENTER_X}" cy="{CENTER_Y}" r="{outer_radius}" '
-            f'fill="none" stroke="{WALL_COLOR}" stroke-width="2"/>'
-        )
+    # Keyframes only depend on the bucket layout, so work that out up front
+    css = [
+        f'.r{{opacity:0;animation:{duration} linear infinite}}',
+        f'.r circle{{opacity:0;animation:{duration} step-end infinite}}',
+    ]
+    groups = []
+    for prefix, cells, reveals, first_frame, radius, color, glow, fade in layers:
+        buckets = _reveal_groups(reveals, first_frame)
+        for j, (bucket_start, bucket) in enumerate(buckets):
+            name = f"{prefix}{j}"
+            
+            # Group: hidden until the bucket starts, then hold and fade out
+            keyframes = []
+            if bucket_start:
+                keyframes.append('0%{opacity:0;animation-timing-function:step-end}')
+            peak = fade[0][1]
+            keyframes.append(f'{_pct(bucket_start, total_frames)}{{opacity:{peak}}}')
+            for frame, opacity in fade:
+                # Past 300 frames the 15-frame pause is under 5% of the loop
+                if frame < total_frames:
+                    keyframes.append(f'{_pct(frame, total_frames)}{{opacity:{opacity}}}')
+            keyframes.append('100%{opacity:0}')
+            css.append(f'@keyframes {name}{{{"".join(keyframes)}}}')
+            css.append(f'.{name}{{animation-name:{name}}}')
+            
+            # Cells: shown from their own delay until the loop wraps past the
+            # bucket start; after that they fall back to the base opacity:0
+            show = _pct(total_frames - bucket_start, total_frames)
+            css.append(f'@keyframes {name}c{{0%{{opacity:1}}{show}{{opacity:0}}}}')
+            css.append(f'.{name} circle{{animation-name:{name}c}}')
+            
+            groups.append((name, cells, bucket, fmt(radius), color, glow))
+    
+    out.line(f'<svg width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}" xmlns="http://www.w3.org/2000/svg">')
+    for line in SVG_DEFS:
+        out.line(line)
+    out.line(f'  <style>{"".join(css)}</style>')
+    out.line(f'  <rect width="{svg_width}" height="{svg_height}" fill="{BG_COLOR}"/>')
     
     # Inner circle
-    svg_parts.append(
-        f'  <circle cx="{CENTER_X}" cy="{CENTER_Y}" r="{INNER_RADIUS}" '
+    out.line(
+        f'  <circle cx="{maze.center}" cy="{maze.center}" r="{INNER_RADIUS}" '
         f'fill="{BG_COLOR}" stroke="{WALL_COLOR}" stroke-width="2"/>'
     )
     
-    # Radial walls
-    for r in range(maze.rings):
-        num_sectors = maze.sectors_per_ring[r]
-        for s in range(num_sectors):
-            if maze.radial_walls[r][s]:
-                angle = 2 * math.pi * (s + 1) / num_sectors
-                inner_r = INNER_RADIUS + r * RING_WIDTH
-                outer_r = INNER_RADIUS + (r + 1) * RING_WIDTH
-                x1 = CENTER_X + inner_r * math.cos(angle)
-                y1 = CENTER_Y + inner_r * math.sin(angle)
-                x2 = CENTER_X + outer_r * math.cos(angle)
-                y2 = CENTER_Y + outer_r * math.sin(angle)
-                svg_parts.append(
-                    f'  <line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
-                    f'stroke="{WALL_COLOR}" stroke-width="2"/>'
-                )
-    
-    # Draw exploration
-    for i, (r, s) in enumerate(exploration_order):
-        cx, cy = maze.get_cell_center(r, s)
-        
-        appear_time = i / total_frames
-        fade_time = (explore_frames + path_frames) / total_frames
-        
-        svg_parts.append(
-            f'  <circle cx="{cx:.1f}" cy="{cy:.1f}" r="{RING_WIDTH * 0.3}" '
-            f'fill="{EXPLORING_COLOR}" filter="url(#glow)" opacity="0">'
-        )
-        svg_parts.append(
-            f'    <animate attributeName="opacity" '
-            f'values="0;0;0.6;0.6;0.15;0" '
-            f'keyTimes="0;{appear_time:.4f};{appear_time + 0.01:.4f};{fade_time:.4f};{fade_time + 0.05:.4f};1" '
-            f'dur="{total_duration}s" repeatCount="indefinite"/>'
+    # Every remaining wall as one path
+    out.write('  <path d="')
+    for command in iter_wall_path(maze):
+        out.write(command)
+    out.line(f'" fill="none" stroke="{WALL_COLOR}" stroke-width="2" stroke-linecap="round"/>')
+    
+    for name, cells, bucket, r, color, glow in groups:
+        out.line(f'  <g class="r {name}" fill="{color}" filter="url(#{glow})">')
+        for index, frame in bucket:
+            cx, cy = maze.get_cell_center(*cells[index])
+            out.line(
+                f'    <circle cx="{fmt(cx)}" cy="{fmt(cy)}" r="{r}" '
+                f'style="animation-delay:{_seconds(frame)}"/>'
+            )
+        out.line('  </g>')
+    
+    # Start point (center) and end point (outer edge)
+    for cell, color in ((start, START_COLOR), (end, END_COLOR)):
+        x, y = maze.get_cell_center(*cell)
+        out.line(
+            f'  <circle cx="{fmt(x)}" cy="{fmt(y)}" r="{fmt(RING_WIDTH * 0.4)}" '
+            f'fill="{color}" filter="url(#glow-strong)"/>'
         )
-        svg_parts.append('  </circle>')
     
-    # Draw solution path
-    for i, (r, s) in enumerate(path):
-        if (r, s) == start or (r, s) == end:
+    out.line('</svg>')
+
+def render_apng(maze, exploration_order, path, start, end, out):
+    """Draw the search frame by frame into an ApngWriter.
+    
+    Each explored or solution cell only dirties its own dot, so every frame
+    after the first encodes a few pixels. Glow is not reproduced.
+    """
+    size = maze.center * 2
+    # Palette: background, walls, explored, solution, start, end
+    canvas = Canvas(size, size)
+    
+    for kind, *geometry in iter_walls(maze):
+        if kind == 'line':
+            angle, inner_r, outer_r = geometry
+            canvas.stroke_line(
+                maze.center + inner_r * math.cos(angle), maze.center + inner_r * math.sin(angle),
+                maze.center + outer_r * math.cos(angle), maze.center + outer_r * math.sin(angle),
+                2, 1,
+            )
+        else:
+            radius, start_angle, end_angle = geometry
+            canvas.stroke_arc(maze.center, maze.center, radius, start_angle, end_angle, 2, 1)
+    canvas.stroke_arc(maze.center, maze.center, INNER_RADIUS, 0, 2 * math.pi, 2, 1)
+    
+    for cell, index in ((start, 4), (end, 5)):
+        canvas.fill_circle(*maze.get_cell_center(*cell), RING_WIDTH * 0.4, index)
+    out.add_frame(canvas)
+    
+    for cell in exploration_order:
+        canvas.fill_circle(*maze.get_cell_center(*cell), RING_WIDTH * 0.3, 2)
+        out.add_frame(canvas)
+    
+    for cell in path:
+        if cell == start or cell == end:
             continue
-        
-        cx, cy = maze.get_cell_center(r, s)
-        
-        appear_time = (explore_frames + i) / total_frames
-        stay_time = (explore_frames + path_frames + pause_frames - 3) / total_frames
-        
-        svg_parts.append(
-            f'  <circle cx="{cx:.1f}" cy="{cy:.1f}" r="{RING_WIDTH * 0.35}" '
-            f'fill="{SOLUTION_COLOR}" filter="url(#glow-strong)" opacity="0">'
-        )
-        svg_parts.append(
-            f'    <animate attributeName="opacity" '
-            f'values="0;0;0.9;0.9;0" '
-            f'keyTimes="0;{appear_time:.4f};{appear_time + 0.01:.4f};{stay_time:.4f};1" '
-            f'dur="{total_duration}s" repeatCount="indefinite"/>'
-        )
-        svg_parts.append('  </circle>')
+        canvas.fill_circle(*maze.get_cell_center(*cell), RING_WIDTH * 0.35, 3)
+        out.add_frame(canvas)
+    
+    # Hold the solved maze, then the loop restarts from the empty first frame
+    out.add_frame(canvas, ticks=15)
+
+APNG_PALETTE = [
+    hex_to_rgb(BG_COLOR),
+    hex_to_rgb(WALL_COLOR),
+    blend(EXPLORING_COLOR, BG_COLOR, 0.6),
+    blend(SOLUTION_COLOR, BG_COLOR, 0.9),
+    hex_to_rgb(START_COLOR),
+    hex_to_rgb(END_COLOR),
+]
+
+def build_maze(rings, sectors_base, seed=None, profiler=None, cache_dir=None):
+    """Generate a maze and solve it from the center to the outer edge.
+    
+    With a cache_dir, the wall arrays and search order are reused from disk
+    whenever the seed, size and generator code are unchanged.
+    """
+    profiler = profiler or Profiler()
+    if seed is None:
+        seed = create_seed()
     
-    # Start point (center)
-    sx, sy = maze.get_cell_center(*start)
-    svg_parts.append(
-        f'  <circle cx="{sx:.1f}" cy="{sy:.1f}" r="{RING_WIDTH * 0.4}" '
-        f'fill="{START_COLOR}" filter="url(#glow-strong)"/>'
+    walls_key = stage_key(
+        'maze-walls', {'rings': rings, 'sectors_base': sectors_base, 'seed': seed},
+        (CircularMaze,),
     )
     
-    # End point (outer edge)
-    ex, ey = maze.get_cell_center(*end)
-    svg_parts.append(
-        f'  <circle cx="{ex:.1f}" cy="{ey:.1f}" r="{RING_WIDTH * 0.4}" '
-        f'fill="{END_COLOR}" filter="url(#glow-strong)"/>'
+    def generate(stats):
+        maze = CircularMaze(rings, sectors_base, seed)
+        stats.update(maze.stats)
+        return {'radial_walls': maze.radial_walls, 'ring_walls': maze.ring_walls}
+    
+    with profiler.stage('generate'):
+        walls = cached('maze-walls', walls_key, generate, cache_dir, profiler)
+        maze = CircularMaze.from_walls(
+            rings, sectors_base, walls['radial_walls'], walls['ring_walls']
+        )
+    
+    # Start at center, end at outer edge
+    start = (0, 0)
+    end = (rings - 1, maze.sectors_per_ring[rings - 1] // 2)
+    
+    # The heuristic depends on cell positions, so geometry is part of the key
+    search_key = stage_key(
+        'maze-search',
+        {'walls': walls_key, 'start': start, 'end': end, 'center': maze.center,
+         'inner_radius': INNER_RADIUS, 'ring_width': RING_WIDTH},
+        (CircularMaze, astar_circular),
     )
     
-    svg_parts.append('</svg>')
+    def search(stats):
+        exploration_order, path = astar_circular(maze, start, end, stats)
+        return {'exploration_order': exploration_order, 'path': path}
     
-    return '\n'.join(svg_parts)
+    with profiler.stage('search'):
+        result = cached('maze-search', search_key, search, cache_dir, profiler)
+    # A cache hit takes no search time, so there is no throughput to report
+    if not profiler.counters.get('cache.maze-search.hits'):
+        profiler.rate('nodes_expanded_per_second', 'astar.nodes_expanded', 'search')
+    exploration_order = [tuple(cell) for cell in result['exploration_order']]
+    path = [tuple(cell) for cell in result['path']]
+    return maze, start, end, exploration_order, path
+
+def write_maze(maze, start, end, exploration_order, path, output,
+               image_format='svg', compress=False, profiler=None):
+    """Render the solved maze to `output` and return the bytes written."""
+    profiler = profiler or Profiler()
+    
+    with profiler.stage('emit'):
+        if image_format == 'apng':
+            size = maze.center * 2
+            with open_apng(output, size, size, APNG_PALETTE, FRAME_DURATION) as out:
+                render_apng(maze, exploration_order, path, start, end, out)
+            profiler.count('apng.frames', out.frames)
+        else:
+            with open_svg(output, compress=compress) as out:
+                generate_svg(maze, exploration_order, path, start, end, out)
+            profiler.count('svg.bytes', out.svg_bytes)
+    
+    profiler.count('output.bytes', out.bytes_written)
+    return out.bytes_written
 
 def main():
-    print("Generating circular neon maze...")
+    parser = argparse.ArgumentParser(description="Generate the circular maze animation.")
+    parser.add_argument('--format', choices=['svg', 'apng'], default='svg',
+                        help="animated SVG, or a delta-encoded APNG for very large mazes")
+    parser.add_argument('--svgz', action='store_true', help="write gzip-compressed .svgz output")
+    parser.add_argument('--profile', metavar='PATH', help="write a per-stage JSON timing report")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="recompute every stage instead of reusing cached results")
+    args = parser.parse_args()
     
-    maze = CircularMaze(RINGS, SECTORS_BASE)
+    print("Generating circular neon maze...")
     
-    # Start at center, end at outer edge
-    start = (0, 0)
-    end = (RINGS - 1, maze.sectors_per_ring[RINGS - 1] // 2)
+    cache_dir = None if args.no_cache else STAGE_CACHE_DIR
+    if cache_dir:
+        prune(cache_dir)
     
-    exploration_order, path = astar_circular(maze, start, end)
+    profiler = Profiler()
+    maze, start, end, exploration_order, path = build_maze(
+        RINGS, SECTORS_BASE, profiler=profiler, cache_dir=cache_dir
+    )
     
     print(f"Rings: {RINGS}, Base sectors: {SECTORS_BASE}")
     print(f"Explored {len(exploration_order)} cells")
     print(f"Path length: {len(path)}")
     
-    svg_content = generate_svg(maze, exploration_order, path, start, end)
-    
-    os.makedirs('dist', exist_ok=True)
+    if args.format == 'apng':
+        output = 'dist/circular-maze.png'
+    else:
+        output = 'dist/circular-maze.svgz' if args.svgz else 'dist/circular-maze.svg'
+    size = write_maze(maze, start, end, exploration_order, path, output,
+                      args.format, args.svgz, profiler)
     
-    with open('dist/circular-maze.svg', 'w') as f:
-        f.write(svg_content)
+    print(f"Generated {output} ({size} bytes)")
     
-    print("Generated circular maze with neon glow")
+    if args.profile:
+        write_report(args.profile, profiler.report(
+            script='generate_maze', rings=RINGS, sectors_base=SECTORS_BASE, format=args.format,
+        ))
+        print(f"Wrote profile to {args.profile}")
 
 if __name__ == "__main__":
     main()
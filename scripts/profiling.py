@@ -0,0 +1,53 @@
+"""
+Per-stage timing and counters for the generator scripts.
+Used by the --profile flag on each script and by bench.py.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+class Profiler:
+    """Collects wall time per pipeline stage plus named counters."""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.rates = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, counters):
+        """Add a dict of counters collected elsewhere (e.g. maze.stats)."""
+        for name, amount in counters.items():
+            self.count(name, amount)
+
+    def rate(self, name, counter, stage):
+        """Record `counter` per second of `stage` under `name` in the report."""
+        seconds = self.stages.get(stage)
+        if seconds and counter in self.counters:
+            self.rates[name] = round(self.counters[counter] / seconds, 3)
+
+    def report(self, **params):
+        return {
+            'params': params,
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'total_seconds': round(sum(self.stages.values()), 6),
+            'counters': dict(self.counters),
+            'rates': dict(self.rates),
+        }
+
+def write_report(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,123 @@
+"""
+On-disk cache for pipeline stage results.
+Each entry is keyed by the stage's inputs plus the source of the code that
+computes it, so changing colors or timing only re-runs the emit stage.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+
+CACHE_DIR = '.cache/stages'
+MAX_AGE_DAYS = 30
+# Bump when the entry layout changes so old entries stop matching
+ENTRY_FORMAT = 2
+
+def stage_key(name, inputs, code=()):
+    """Hash of a stage's name, JSON-serialisable inputs and code."""
+    digest = hashlib.sha256(f"{name}:{ENTRY_FORMAT}".encode())
+    digest.update(json.dumps(inputs, sort_keys=True).encode())
+    for obj in code:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()[:20]
+
+def _entry_path(cache_dir, name, key):
+    return os.path.join(cache_dir, f"{name}-{key}.jsonl")
+
+def _write_lines(path, lines):
+    """Write lines to a temp file and rename it into place."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for line in lines:
+                f.write(line + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _record(profiler, name, outcome, counters):
+    if profiler is not None:
+        profiler.count(f"cache.{name}.{outcome}")
+        profiler.merge(counters)
+
+def cached(name, key, compute, cache_dir=CACHE_DIR, profiler=None):
+    """Return the JSON-serialisable result of `compute(stats)`, cached under `key`.
+
+    `compute` adds its counters to the `stats` dict it is given. They are
+    stored with the result and merged into `profiler` on hits as well as
+    misses, so a warm run reports the same counters as a cold one.
+    """
+    stats = {}
+    if cache_dir is None:
+        value = compute(stats)
+        if profiler is not None:
+            profiler.merge(stats)
+        return value
+    path = _entry_path(cache_dir, name, key)
+    if os.path.exists(path):
+        with open(path) as f:
+            entry = json.load(f)
+        os.utime(path)
+        _record(profiler, name, 'hits', entry['counters'])
+        return entry['value']
+    value = compute(stats)
+    entry = {'counters': stats, 'value': value}
+    _write_lines(path, [json.dumps(entry, separators=(',', ':'))])
+    _record(profiler, name, 'misses', stats)
+    return value
+
+def cached_stream(name, key, compute, encode, decode, cache_dir=CACHE_DIR, profiler=None):
+    """Yield items from `compute(stats)`, cached one line per item under `key`.
+
+    Items stream through in both directions, so long runs never have to be
+    held in memory. A miss is only stored once the iterator is exhausted;
+    its counters go on a final line and are merged into `profiler` when the
+    items run out, as in cached().
+    """
+    stats = {}
+    if cache_dir is None:
+        yield from compute(stats)
+        if profiler is not None:
+            profiler.merge(stats)
+        return
+    path = _entry_path(cache_dir, name, key)
+    if os.path.exists(path):
+        os.utime(path)
+        with open(path) as f:
+            # Hold each line back one step: the last one is the counters
+            previous = None
+            for line in f:
+                if previous is not None:
+                    yield decode(previous)
+                previous = line.rstrip('\n')
+        _record(profiler, name, 'hits', json.loads(previous))
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for item in compute(stats):
+                f.write(encode(item) + '\n')
+                yield item
+            f.write(json.dumps(stats, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, path)
+        _record(profiler, name, 'misses', stats)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def prune(cache_dir=CACHE_DIR, max_age_days=MAX_AGE_DAYS):
+    """Delete entries that haven't been used for `max_age_days`."""
+    if not os.path.isdir(cache_dir):
+        return
+    cutoff = time.time() - max_age_days * 86400
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.unlink(entry.path)
@@ -0,0 +1,75 @@
+"""
+Streaming SVG writer shared by the generator scripts.
+Elements go straight to a buffered file handle instead of a list of lines,
+and the finished file is renamed into place so readers never see a partial SVG.
+"""
+
+import gzip
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+
+BUFFER_SIZE = 1 << 16
+
+@lru_cache(maxsize=1 << 16)
+def fmt(value):
+    """Format a coordinate with one decimal, dropping a trailing '.0'."""
+    text = f"{value:.1f}"
+    if text == "-0.0":
+        # Tiny negatives from cos/sin round to zero; don't emit "-0"
+        return "0"
+    return text[:-2] if text.endswith(".0") else text
+
+class SvgWriter:
+    """Thin wrapper over a text stream that tracks how much was emitted.
+
+    `svg_bytes` is the size of the SVG markup before any compression (the
+    markup is ASCII, so characters and bytes agree); open_svg() sets
+    `bytes_written` to the size of the file on disk.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.svg_bytes = 0
+        self.bytes_written = None
+
+    def write(self, text):
+        """Write raw text (no newline added)."""
+        self._stream.write(text)
+        self.svg_bytes += len(text)
+
+    def line(self, text):
+        """Write one line of markup."""
+        self.write(text + '\n')
+
+@contextmanager
+def open_svg(path, compress=False):
+    """Stream an SVG to `path`, optionally gzip-compressed (.svgz).
+
+    Output goes to a temp file in the same directory and is swapped in with
+    os.replace() once the block exits cleanly.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'wb', buffering=BUFFER_SIZE) as raw:
+            # mtime=0 keeps compressed output reproducible for the same input
+            binary = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if compress else raw
+            text = io.TextIOWrapper(binary, encoding='utf-8', newline='\n')
+            writer = SvgWriter(text)
+            yield writer
+            # Detach so closing the wrapper doesn't also close the raw file twice
+            text.detach()
+            if compress:
+                binary.close()
+        writer.bytes_written = os.path.getsize(tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise